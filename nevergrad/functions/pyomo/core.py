@@ -2,11 +2,20 @@
 #
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
+import sys
+import math
+import multiprocessing
+from concurrent import futures
 from functools import partial
 import numpy as np
 import pyomo.environ as pyomo
+from pyomo.core.expr import numeric_expr
+from pyomo.core.expr.numvalue import native_numeric_types
+from pyomo.core.expr.visitor import identify_variables
+from pyomo.repn import generate_standard_repn
 import nevergrad.common.typing as tp
 from nevergrad.parametrization import parameter as p
+from nevergrad.optimization import base as obase
 from .. import base
 
 
@@ -20,6 +29,26 @@ def _convert_to_ng_name(pyomo_var_key: tp.Any) -> str:
         return str(pyomo_var_key)
 
 
+def _make_pyomo_variable_name(model_component: pyomo.Var, pyomo_var_key: tp.Any) -> str:
+    # names are interned since they are generated several times and then used as keys for all evaluations
+    if pyomo_var_key is None:
+        return sys.intern(str(model_component.name))
+    return sys.intern(f"{model_component.name}[{_convert_to_ng_name(pyomo_var_key)}]")
+
+
+def _get_contiguous_integer_bounds(ranges: tp.List[tp.Any]) -> tp.Optional[tp.Tuple[int, int]]:
+    """Returns the bounds of the union of the integer ranges if it has no gap, None otherwise"""
+    if any(r.step not in [-1, 1] or r.start != int(r.start) or r.end != int(r.end) for r in ranges):
+        return None  # stepped or non-integer ranges
+    intervals = sorted((min(r.start, r.end), max(r.start, r.end)) for r in ranges)
+    lb, ub = intervals[0]
+    for start, end in intervals[1:]:
+        if start > ub + 1:
+            return None
+        ub = max(ub, end)
+    return lb, ub
+
+
 def _make_pyomo_range_set_to_parametrization(
     domain: pyomo.RangeSet, params: ParamDict, params_name: str
 ) -> ParamDict:
@@ -42,11 +71,13 @@ def _make_pyomo_range_set_to_parametrization(
                 params[params_name].set_integer_casting()  # type: ignore
         else:
             raise NotImplementedError(f"Cannot handle range type {type(ranges[0])}")
-    elif isinstance(domain, pyomo.FiniteSimpleRangeSet):
-        # Need to handle step size
-        params[params_name] = p.Choice(
-            [range(*r) for r in domain.ranges()]
-        )  # Assume the ranges do not overlapped
+    elif isinstance(domain, pyomo.base.set.FiniteSimpleRangeSet):
+        bounds = _get_contiguous_integer_bounds(ranges)
+        if bounds is not None:
+            # Ordinal parametrization, which does not grow with the size of the domain
+            params[params_name] = p.Scalar(lower=bounds[0], upper=bounds[1]).set_integer_casting()
+        else:
+            params[params_name] = p.Choice(list(domain))  # stepped or non-contiguous set
     else:
         raise NotImplementedError(f"Cannot handle domain type {type(domain)}")
     return params
@@ -60,21 +91,21 @@ def _make_pyomo_variable_to_parametrization(model_component: pyomo.Var, params:
     # Such conversion has to be done in _pyomo_obj_function_wrapper and _pyomo_constraint_wrapper, which slows down optimization.
     if not isinstance(model_component, (pyomo.base.var.IndexedVar, pyomo.base.var.SimpleVar)):
         raise NotImplementedError  # Normally, Pyomo will create a set for the indices used by a variable
+    # data of a same variable usually share their domain, which values are then only listed once
+    domain_values: tp.Dict[int, tp.Tuple[tp.Any, ...]] = {}
     for k, v in model_component._data.items():
         if isinstance(v, pyomo.base.var._GeneralVarData):
             if v.is_fixed():
                 raise NotImplementedError
-            if k is None:
-                params_name = str(model_component.name)
-            else:
-                params_name = f"{model_component.name}[{_convert_to_ng_name(k)}]"
+            params_name = _make_pyomo_variable_name(model_component, k)
             if isinstance(v.domain, pyomo.RangeSet):
                 params = _make_pyomo_range_set_to_parametrization(v.domain, params, params_name)
             elif isinstance(v.domain, pyomo.Set) and v.domain.isfinite():
-                if v.domain.isordered():
-                    params[params_name] = p.Choice(list(v.domain.ordered_data()))
-                else:
-                    params[params_name] = p.Choice(list(v.domain.data()))
+                values = domain_values.get(id(v.domain))
+                if values is None:
+                    values = tuple(v.domain.ordered_data() if v.domain.isordered() else v.domain.data())
+                    domain_values[id(v.domain)] = values
+                params[params_name] = p.Choice(values)
             else:
                 raise NotImplementedError(f"Cannot handle domain type {type(v.domain)}")
         else:
@@ -82,6 +113,129 @@ def _make_pyomo_variable_to_parametrization(model_component: pyomo.Var, params:
     return params
 
 
+def _constant_to_source(value: tp.Any, constants: tp.Dict[str, tp.Any]) -> str:
+    if value.__class__ in (int, float) and math.isfinite(value):
+        return repr(value)
+    # other constants (eg: inf, nan) have no literal, they are named in the namespace of the compiled code
+    name = f"_c{len(constants)}"
+    constants[name] = value
+    return name
+
+
+def _expression_to_source(expr: tp.Any, names: tp.Dict[int, str], constants: tp.Dict[str, tp.Any]) -> str:
+    """Converts a Pyomo expression into the source code of an equivalent arithmetic expression
+    of the variables, which are named through the names dict (keys are the ids of the variable data).
+    Constants without literal are added to the constants dict, to be provided in the namespace of the code.
+    Raises NotImplementedError for unsupported nodes (eg: mutable parameters, external functions)
+    """
+    if expr.__class__ in native_numeric_types:
+        return _constant_to_source(expr, constants)
+    if not expr.is_expression_type():
+        if expr.is_variable_type() and id(expr) in names:
+            return names[id(expr)]
+        if expr.is_constant():
+            return _constant_to_source(pyomo.value(expr), constants)
+        raise NotImplementedError(f"Cannot compile component {expr.name}")
+    if expr.is_named_expression_type():
+        return _expression_to_source(expr.expr, names, constants)
+    if isinstance(expr, numeric_expr.LinearExpression):
+        terms = [_expression_to_source(expr.constant, names, constants)]
+        for coef, var in zip(expr.linear_coefs, expr.linear_vars):
+            coef_source = _expression_to_source(coef, names, constants)
+            terms.append(f"{coef_source} * {_expression_to_source(var, names, constants)}")
+        return "(" + " + ".join(terms) + ")"
+    args = [_expression_to_source(arg, names, constants) for arg in expr.args]
+    if isinstance(expr, numeric_expr.SumExpressionBase):
+        return "(" + " + ".join(args) + ")"
+    if isinstance(expr, numeric_expr.ProductExpression):  # including monomials
+        return f"({args[0]} * {args[1]})"
+    if isinstance(expr, numeric_expr.DivisionExpression):
+        return f"({args[0]} / {args[1]})"
+    if isinstance(expr, numeric_expr.ReciprocalExpression):
+        return f"(1 / {args[0]})"
+    if isinstance(expr, numeric_expr.PowExpression):
+        return f"({args[0]} ** {args[1]})"
+    if isinstance(expr, numeric_expr.NegationExpression):
+        return f"(-{args[0]})"
+    if isinstance(expr, numeric_expr.AbsExpression):
+        return f"abs({args[0]})"
+    if isinstance(expr, numeric_expr.UnaryFunctionExpression) and hasattr(math, expr.getname()):
+        return f"math.{expr.getname()}({args[0]})"
+    raise NotImplementedError(f"Cannot compile expression of type {type(expr)}")
+
+
+def _is_constant(value: tp.Any) -> bool:
+    return value.__class__ in native_numeric_types or value.is_constant()
+
+
+def _linearize(expr: tp.Any, indices: tp.Dict[int, int]) -> tp.Optional[tp.Tuple[np.ndarray, float]]:
+    """Returns the coefficients (ordered through the indices dict, whose keys are the ids of the variable data)
+    and the constant of a linear expression, or None if the expression is not linear with constant coefficients
+    """
+    try:
+        repn = generate_standard_repn(expr, compute_values=False)
+    except Exception:  # pylint: disable=broad-except
+        return None  # some nonlinear expressions cannot be processed without values (eg: Expr_if)
+    if not repn.is_linear() or not all(_is_constant(c) for c in (repn.constant,) + tuple(repn.linear_coefs)):
+        return None
+    coefs = np.zeros(len(indices))
+    for coef, var in zip(repn.linear_coefs, repn.linear_vars):
+        if id(var) not in indices:
+            return None
+        coefs[indices[id(var)]] += pyomo.value(coef)
+    return coefs, float(pyomo.value(repn.constant))
+
+
+def _constant_objective(value: float, k_model_variables: tp.Dict[str, tp.Any]) -> float:
+    # pylint: disable=unused-argument
+    return value
+
+
+def _monomial_objective(coef: float, name: str, k_model_variables: tp.Dict[str, tp.Any]) -> float:
+    return coef * k_model_variables[name]  # type: ignore
+
+
+# Pyomo instance of the current worker process, see Pyomo.make_process_executor
+_WORKER_FUNCTION: tp.Optional["Pyomo"] = None
+
+
+def _set_worker_function(func: "Pyomo") -> None:
+    global _WORKER_FUNCTION  # pylint: disable=global-statement
+    _WORKER_FUNCTION = func
+
+
+def _call_worker_function(*args: tp.Any, **kwargs: tp.Any) -> tp.Loss:
+    assert _WORKER_FUNCTION is not None, "Worker function was not initialized"
+    return _WORKER_FUNCTION.function(*args, **kwargs)
+
+
+class _PyomoProcessPoolExecutor(futures.ProcessPoolExecutor):
+    """Process pool whose workers hold the Pyomo instance, so that submitting its function
+    only sends the arguments to the workers instead of pickling the model at each call
+    """
+
+    def __init__(self, func: "Pyomo", max_workers: tp.Optional[int] = None) -> None:
+        self._function: tp.Optional[tp.Callable[..., tp.Any]] = None
+        if sys.version_info < (3, 7):  # no initializer, the instance is then pickled with each submission
+            super().__init__(max_workers=max_workers)
+            return
+        # with "fork", workers share the memory of the model (copy-on-write) instead of unpickling it,
+        # but forking is only safe on Linux (the default method of other platforms is kept)
+        method = "fork" if sys.platform.startswith("linux") else None
+        super().__init__(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context(method),
+            initializer=_set_worker_function,
+            initargs=(func,),
+        )
+        self._function = func.function
+
+    def submit(self, fn: tp.Callable[..., tp.Any], *args: tp.Any, **kwargs: tp.Any) -> futures.Future:  # type: ignore
+        if fn is self._function:
+            fn = _call_worker_function
+        return super().submit(fn, *args, **kwargs)
+
+
 class Pyomo(base.ExperimentFunction):
     """Function calling Pyomo model
 
@@ -89,6 +243,14 @@ class Pyomo(base.ExperimentFunction):
     ----------
     model: pyomo.environ.model
         Pyomo model
+    copy_model: bool
+        whether to work on a clone of the model (default) or on the model itself.
+        Not copying saves time and memory for big models, but the variables of the model are then
+        modified by the evaluations which go through Pyomo (those of linear, compiled or single term
+        objectives and of linear constraints work on the values directly), and the function (as well as
+        its copies, which share the model) cannot be evaluated concurrently in several threads.
+        Results of the last evaluations being cached, clear_cache() must be called after modifying
+        the model (eg: the values of its mutable parameters).
 
     Returns
     -------
@@ -101,9 +263,11 @@ class Pyomo(base.ExperimentFunction):
     - Any changes on the model externally can lead to unexpected behaviours.
     """
 
-    def __init__(self, model: pyomo.Model) -> None:
+    def __init__(self, model: pyomo.Model, copy_model: bool = True) -> None:
         if isinstance(model, pyomo.ConcreteModel):
-            self._model_instance = model.clone()  # To enable the objective function to run in parallel
+            # Cloning enables the objective function to run in parallel
+            self._model_instance = model.clone() if copy_model else model
+            self._copy_model = copy_model
         else:
             raise NotImplementedError(
                 "AbstractModel is not supported. Please use create_instance() in Pyomo to create a model instance."
@@ -117,67 +281,442 @@ class Pyomo(base.ExperimentFunction):
 
         # Relevant document: https://pyomo.readthedocs.io/en/stable/working_models.html
 
-        for v in self._model_instance.component_objects(pyomo.Var, active=True):
-            self.all_vars.append(v)
+        # Single traversal of the model, components are dispatched depending on their type
+        components: tp.Dict[tp.Any, tp.List[tp.Any]] = {
+            pyomo.Var: self.all_vars,
+            pyomo.Param: self.all_params,
+            pyomo.Constraint: self.all_constraints,
+            pyomo.Objective: self.all_objectives,
+        }
+        for v in self._model_instance.component_objects(active=True, descend_into=True):
+            bucket = components.get(v.ctype)
+            if bucket is not None:
+                bucket.append(v)
+        for v in self.all_vars:
             _make_pyomo_variable_to_parametrization(v, instru_params)
-        for v in self._model_instance.component_objects(pyomo.Param, active=True):
-            self.all_params.append(v)
-        for v in self._model_instance.component_objects(pyomo.Constraint, active=True):
-            self.all_constraints.append(v)
-        for v in self._model_instance.component_objects(pyomo.Objective, active=True):
-            # if v.sense == -1:
-            #    print(f"Only minimization problem is supported. The value of the objective function {v.name} will be multiplied by -1.")
-            self.all_objectives.append(v)
 
         if not self.all_objectives:
             raise NotImplementedError("Cannot find objective function")
 
         if len(self.all_objectives) > 1:
             raise NotImplementedError("Multi-objective function is not supported yet.")
+        # The expression and its sign are cached so that no product expression is built at each evaluation,
+        # and expressions are evaluated through their __call__, skipping the dispatch of pyomo.value
+        self._obj_expr = self.all_objectives[0].expr
+        self._obj_sign = float(self.all_objectives[0].sense)
 
-        self._value_assignment_code_obj = ""
+        # Setters are resolved once, so that assigning values requires neither exec nor attribute lookups
+        self._setters: tp.Dict[str, tp.Callable[[tp.Any], None]] = {
+            _make_pyomo_variable_name(v, k): d.set_value for v in self.all_vars for k, d in v._data.items()
+        }
+        # ... and stored in the order of the parametrization, to be iterated alongside the parameter names
+        self._param_names = tuple(self._setters)
+        self._setter_list = tuple(self._setters.values())
+        # Pyomo validates the values when assigning them, which is skipped by the evaluations working on the
+        # values directly, so they are validated separately (except for real domains which accept any number)
+        self._validators: tp.Tuple[tp.Tuple[str, tp.Callable[[tp.Any], bool]], ...] = tuple(
+            (_make_pyomo_variable_name(v, k), d._valid_value)
+            for v in self.all_vars
+            for k, d in v._data.items()
+            if d.domain is not pyomo.Reals
+        )
+        # ... and by columns for batches: values strictly inside the interval of a continuous domain are valid,
+        # so that only the other values (and the distinct values of other domains) are validated one by one
+        columns = {k: j for j, k in enumerate(self._param_names)}
+        self._column_validators: tp.List[tp.Tuple[int, tp.Any, tp.Optional[tp.Tuple[float, float]]]] = []
+        for k, validator in self._validators:
+            lb, ub, step = validator.__self__.domain.get_interval()  # type: ignore
+            interval = None if step != 0 else (-np.inf if lb is None else lb, np.inf if ub is None else ub)
+            self._column_validators.append((columns[k], validator, interval))
+        # Expressions of the constraints are resolved once, indexed constraints being flattened
+        self._constraint_data: tp.List[tp.List[tp.Any]] = []
+        for c in self.all_constraints:
+            if isinstance(c, pyomo.base.constraint.SimpleConstraint):
+                self._constraint_data.append([c])
+            elif isinstance(c, pyomo.base.constraint.IndexedConstraint):
+                self._constraint_data.append(list(c.values()))
+            else:
+                raise NotImplementedError(f"Constraint type {c.ctype} is not supported yet.")
+        self._constraint_exprs = [[c_data.expr for c_data in data] for data in self._constraint_data]
+        # (body, lb, ub) of each constraint, to evaluate the body without building relational expressions,
+        # or None if some bounds are not constant (they are then evaluated through the expressions)
+        self._constraint_bounds: tp.List[tp.Optional[tp.List[tp.Tuple[tp.Any, float, float]]]] = []
+        for data in self._constraint_data:
+            bounds = [(c_data.body, c_data.lower, c_data.upper) for c_data in data]
+            if all(b is None or _is_constant(b) for _, lb, ub in bounds for b in (lb, ub)):
+                self._constraint_bounds.append(
+                    [
+                        (
+                            body,
+                            -np.inf if lb is None else pyomo.value(lb),
+                            np.inf if ub is None else pyomo.value(ub),
+                        )
+                        for body, lb, ub in bounds
+                    ]
+                )
+            else:
+                self._constraint_bounds.append(None)
+        self._try_linearize()
+        self._fast_obj = self._try_fast_objective()
+        # names of the variables of the objective, which are the arguments of the compiled objective
+        self._jit_names: tp.Tuple[str, ...] = ()
+        self._jit_obj = self._try_jit_objective()
+        # kwargs dict whose values are currently assigned to the model (not tracked if the model is not copied,
+        # since other instances such as copies of the function may then assign it as well)
+        self._last_assigned: tp.Optional[tp.Dict[str, tp.Any]] = None
+        # results of the last evaluated candidates, keyed by their values (None for the objective,
+        # constraint index otherwise), since constraints and objective are evaluated on the same candidates
+        self._cache: tp.Dict[tp.Tuple[tp.Any, ...], tp.Dict[tp.Optional[int], tp.Any]] = {}
+        self._cache_size = 8
+        # All constraints of a candidate are checked on the same kwargs dict, which only needs to be processed once
+        self._last_checked: tp.Optional[tp.Dict[str, tp.Any]] = None
+        self._last_entry: tp.Dict[tp.Optional[int], tp.Any] = {}
+        self._last_x: tp.Optional[np.ndarray] = None
 
         instru = p.Instrumentation(**instru_params).set_name("")
         for c_idx in range(0, len(self.all_constraints)):
             instru.register_cheap_constraint(partial(self._pyomo_constraint_wrapper, c_idx))
-        super().__init__(
-            function=partial(self._pyomo_obj_function_wrapper, 0), parametrization=instru
-        )  # Single objective
+        # Single objective
+        super().__init__(function=self._pyomo_obj_function_wrapper, parametrization=instru)
 
         exp_tag = ",".join([n.name for n in self.all_objectives])
         exp_tag += "|" + ",".join([n.name for n in self.all_vars])
         exp_tag += "|" + ",".join([n.name for n in self.all_constraints])
         self.add_descriptors(name=exp_tag)
 
+    def _try_linearize(self) -> None:
+        """Extracts the coefficients of the objective and of the constraints when they are linear,
+        so that they are evaluated with numpy on the vector of variable values instead of Pyomo expressions
+        """
+        indices = {id(setter.__self__): i for i, setter in enumerate(self._setter_list)}  # type: ignore
+        self._obj_c: tp.Optional[np.ndarray] = None
+        self._obj_constant = 0.0
+        obj_repn = _linearize(self._obj_expr, indices)
+        if obj_repn is not None:
+            self._obj_c, self._obj_constant = obj_repn
+        # constraints are stacked as lb <= A @ x <= ub, with rows of constraint i in _con_slices[i]
+        self._con_A: tp.Optional[np.ndarray] = None
+        self._con_lb = np.empty(0)
+        self._con_ub = np.empty(0)
+        self._con_slices: tp.List[slice] = []
+        rows: tp.List[np.ndarray] = []
+        lbs: tp.List[float] = []
+        ubs: tp.List[float] = []
+        for data in self._constraint_data:
+            self._con_slices.append(slice(len(rows), len(rows) + len(data)))
+            for c_data in data:
+                repn = _linearize(c_data.body, indices)
+                bounds = (c_data.lower, c_data.upper)
+                if repn is None or not all(b is None or _is_constant(b) for b in bounds):
+                    return
+                rows.append(repn[0])
+                lbs.append(-np.inf if c_data.lower is None else pyomo.value(c_data.lower) - repn[1])
+                ubs.append(np.inf if c_data.upper is None else pyomo.value(c_data.upper) - repn[1])
+        if rows:
+            self._con_A = np.array(rows)
+            self._con_lb = np.array(lbs)
+            self._con_ub = np.array(ubs)
+
+    def _make_vector(self, k_model_variables: tp.Dict[str, tp.Any]) -> np.ndarray:
+        return np.array([k_model_variables[k] for k in self._param_names], dtype=float)
+
+    def _try_fast_objective(self) -> tp.Optional[tp.Callable[[tp.Dict[str, tp.Any]], float]]:
+        """Specializes constant and single monomial objectives, which are then evaluated
+        from the keyword arguments without Pyomo nor numpy
+        """
+        expr = self._obj_expr
+        if expr.__class__ in native_numeric_types or not expr.is_potentially_variable():
+            return partial(_constant_objective, float(pyomo.value(expr))) if _is_constant(expr) else None
+        if isinstance(expr, numeric_expr.MonomialTermExpression):
+            coef, var = expr.args
+        elif expr.is_variable_type():
+            coef, var = 1.0, expr
+        else:
+            return None
+        names = {id(setter.__self__): name for name, setter in self._setters.items()}  # type: ignore
+        if id(var) not in names or not _is_constant(coef):
+            return None
+        return partial(_monomial_objective, float(pyomo.value(coef)), names[id(var)])
+
+    def _try_jit_objective(self) -> tp.Optional[tp.Callable[..., float]]:
+        """Compiles the objective expression into a function taking the values of the variables it uses as
+        arguments (in the order of _jit_names), with numba if it is installed and all these variables are real.
+        Returns None if the expression cannot be compiled, in which case the objective is evaluated by Pyomo.
+        """
+        if self._obj_c is not None:
+            return None  # linear objectives are evaluated with numpy
+        indices = {id(setter.__self__): i for i, setter in enumerate(self._setter_list)}  # type: ignore
+        variables = list(identify_variables(self._obj_expr, include_fixed=False))
+        if any(id(v) not in indices for v in variables):
+            return None
+        used = sorted({indices[id(v)] for v in variables})
+        names = {id(self._setter_list[i].__self__): f"x{i}" for i in used}  # type: ignore
+        self._jit_names = tuple(self._param_names[i] for i in used)
+        constants: tp.Dict[str, tp.Any] = {}
+        try:
+            source = _expression_to_source(self._obj_expr, names, constants)
+        except (NotImplementedError, RecursionError, MemoryError):
+            return None
+        code = f"def _objective({', '.join(names.values())}):\n    return {source}\n"
+        namespace: tp.Dict[str, tp.Any] = {"math": math, **constants}
+        try:
+            exec(compile(code, "<pyomo-objective>", "exec"), namespace)  # pylint: disable=exec-used
+        except (SyntaxError, RecursionError, MemoryError):  # eg: too deeply nested expressions
+            return None
+        func = namespace["_objective"]
+        try:
+            import numba  # type: ignore  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            return func  # type: ignore
+        NumericRange = pyomo.base.range.NumericRange
+        if not all(isinstance(r, NumericRange) for v in variables for r in v.domain.ranges()):
+            return func  # type: ignore  # values which are not numbers cannot be passed as float64
+        try:
+            signature = f"float64({', '.join(['float64'] * len(names))})"
+            return numba.njit(signature, error_model="python")(func)  # type: ignore  # raises as Python does
+        except Exception:  # pylint: disable=broad-except
+            return None  # the function may not be valid either
+
+    def __getstate__(self) -> tp.Dict[str, tp.Any]:
+        state = dict(self.__dict__)
+        state["_jit_obj"] = None  # compiled functions cannot be pickled
+        return state
+
+    def __setstate__(self, state: tp.Dict[str, tp.Any]) -> None:
+        self.__dict__.update(state)
+        self._jit_obj = self._try_jit_objective()
+
     def _pyomo_value_assignment(self, k_model_variables: tp.Dict[str, tp.Any]) -> None:
-        if self._value_assignment_code_obj == "":
-            code_str = ""
-            for k in k_model_variables:
-                code_str += f"self._model_instance.{k} = k_model_variables['{k}']\n"
-            self._value_assignment_code_obj = compile(code_str, "<string>", "exec")
-        # TODO find a way to avoid exec
-        exec(self._value_assignment_code_obj)  # pylint: disable=exec-used
-
-    def _pyomo_obj_function_wrapper(self, i: int, **k_model_variables: tp.Dict[str, tp.Any]) -> float:
-        self._pyomo_value_assignment(k_model_variables)
-        return float(
-            pyomo.value(self.all_objectives[i] * self.all_objectives[i].sense)
-        )  # Single objective assumption
+        for setter, k in zip(self._setter_list, self._param_names):
+            setter(k_model_variables[k])
+        if self._copy_model:
+            self._last_assigned = k_model_variables  # keeping the reference ensures its id is not reused
+
+    def _check_domains(self, k_model_variables: tp.Dict[str, tp.Any]) -> None:
+        """Raises a ValueError if a value is not in the domain of its variable, as when assigning it"""
+        for k, validator in self._validators:
+            validator(k_model_variables[k])
+
+    def _check_batch_domains(self, X: np.ndarray) -> None:
+        """Raises a ValueError if a value of the batch is not in the domain of its variable"""
+        for j, validator, interval in self._column_validators:
+            column = X[:, j]
+            if interval is not None:
+                column = column[~np.logical_and(column > interval[0], column < interval[1])]
+            for value in np.unique(column):
+                validator(value)
+
+    def clear_cache(self) -> None:
+        """Forgets the results of the last evaluations, which must be done after modifying the model"""
+        self._cache.clear()
+        self._last_assigned = None
+        self._last_checked = None
+        self._last_entry = {}
+        self._last_x = None
+
+    def _get_cache_entry(self, k_model_variables: tp.Dict[str, tp.Any]) -> tp.Dict[tp.Optional[int], tp.Any]:
+        key = tuple(k_model_variables[k] for k in self._param_names)
+        try:
+            entry = self._cache.get(key)
+        except TypeError:  # unhashable values, no caching
+            return {}
+        if entry is None:
+            if len(self._cache) >= self._cache_size:
+                del self._cache[next(iter(self._cache))]  # oldest entry
+            entry = self._cache[key] = {}
+        return entry
+
+    def _pyomo_obj_function_wrapper(self, **k_model_variables: tp.Dict[str, tp.Any]) -> float:
+        if self._fast_obj is not None or self._obj_c is not None or self._jit_obj is not None:
+            return self._evaluate_objective(k_model_variables)  # cheaper than a cache lookup
+        entry = self._get_cache_entry(k_model_variables)
+        if None not in entry:
+            entry[None] = self._evaluate_objective(k_model_variables)
+        return entry[None]  # type: ignore
+
+    def _evaluate_objective(self, k_model_variables: tp.Dict[str, tp.Any]) -> float:
+        if self._fast_obj is None and self._obj_c is None and self._jit_obj is None:
+            self._pyomo_value_assignment(k_model_variables)
+            return self._obj_sign * float(self._obj_expr())  # Single objective assumption
+        self._check_domains(k_model_variables)  # values are not assigned to the model
+        if self._fast_obj is not None:
+            return self._obj_sign * self._fast_obj(k_model_variables)
+        if self._obj_c is not None:
+            x = self._make_vector(k_model_variables)
+            return self._obj_sign * (float(self._obj_c @ x) + self._obj_constant)
+        return self._obj_sign * self._evaluate_jit_objective(k_model_variables)
+
+    def _evaluate_jit_objective(self, k_model_variables: tp.Dict[str, tp.Any]) -> float:
+        assert self._jit_obj is not None
+        value = float(self._jit_obj(*[k_model_variables[k] for k in self._jit_names]))
+        if math.isnan(value):  # numba returns nan where Python raises (eg: x ** 0.5 for x < 0), Pyomo decides
+            self._pyomo_value_assignment(k_model_variables)
+            value = float(self._obj_expr())
+        return value
+
+    def evaluate_population(self, population: tp.Sequence[tp.Dict[str, tp.Any]]) -> np.ndarray:
+        """Evaluates the objective function on a batch of candidates,
+        for instance all the candidates asked at once to an optimizer with num_workers > 1
+
+        Parameters
+        ----------
+        population: sequence of dict
+            the keyword arguments of each candidate (eg: [candidate.kwargs for candidate in candidates])
+
+        Returns
+        -------
+        np.ndarray
+            the fitness of each candidate
+        """
+        if self._obj_c is not None:
+            return self._evaluate_linear_objective(
+                np.array([self._make_vector(kwargs) for kwargs in population])
+            )
+        out = np.empty(len(population))
+        if self._jit_obj is not None:
+            for i, k_model_variables in enumerate(population):
+                self._check_domains(k_model_variables)
+                out[i] = self._evaluate_jit_objective(k_model_variables)
+            return self._obj_sign * out
+        obj_expr = self._obj_expr
+        for i, k_model_variables in enumerate(population):
+            self._pyomo_value_assignment(k_model_variables)
+            out[i] = obj_expr()
+        return self._obj_sign * out
+
+    def _evaluate_linear_objective(self, X: np.ndarray) -> np.ndarray:
+        if self._column_validators:
+            self._check_batch_domains(X)  # values are not assigned to the model
+        return self._obj_sign * (X @ self._obj_c + self._obj_constant)  # type: ignore
+
+    def evaluate_batch(self, X: np.ndarray) -> tp.Tuple[np.ndarray, np.ndarray]:
+        """Evaluates the objective function and the constraints on a batch of candidates,
+        with a single matrix product for linear models
+
+        Parameters
+        ----------
+        X: np.ndarray
+            2D array with one candidate per row, and one column per variable,
+            in the order of the keyword arguments of the parametrization
+
+        Returns
+        -------
+        np.ndarray
+            the fitness of each candidate
+        np.ndarray
+            boolean mask of the candidates which satisfy all the constraints
+        """
+        X = np.asarray(X, dtype=float)
+        population: tp.Optional[tp.List[tp.Dict[str, tp.Any]]] = None
+        # the objective validates the domains (the model being assigned by Pyomo evaluations)
+        if self._obj_c is not None:
+            obj_values = self._evaluate_linear_objective(X)
+        else:
+            population = [dict(zip(self._param_names, x)) for x in X]
+            obj_values = self.evaluate_population(population)
+        if self._con_A is not None:
+            values = X @ self._con_A.T
+            feasible = np.logical_and(values >= self._con_lb, values <= self._con_ub).all(axis=1)
+        else:
+            if population is None:
+                population = [dict(zip(self._param_names, x)) for x in X]
+            num_constraints = len(self._constraint_data)
+            feasible = np.array(
+                [
+                    all(self._pyomo_constraint_wrapper(i, ((), kwargs)) for i in range(num_constraints))
+                    for kwargs in population
+                ],
+                dtype=bool,
+            )
+        return obj_values, feasible
+
+    def make_process_executor(self, max_workers: tp.Optional[int] = None) -> _PyomoProcessPoolExecutor:
+        """Creates a process pool executor for evaluating this function in parallel,
+        eg: optimizer.minimize(func.function, executor=func.make_process_executor(optimizer.num_workers))
+
+        Parameters
+        ----------
+        max_workers: optional int
+            maximum number of worker processes
+
+        Note
+        ----
+        Each worker process holds its own instance of the model, inherited through "fork" on Linux
+        (copy-on-write), or unpickled once at the worker startup otherwise. Submitting this instance's
+        function then only sends the arguments to the workers (with Python >= 3.7, the instance
+        being pickled with each submission on older versions).
+        """
+        return _PyomoProcessPoolExecutor(self, max_workers=max_workers)
+
+    def drive(
+        self,
+        optimizer: obase.Optimizer,
+        budget: tp.Optional[int] = None,
+        num_workers: tp.Optional[int] = None,
+    ) -> p.Parameter:
+        """Minimizes the function with an asynchronous ask/tell loop, evaluating candidates in worker processes
+        which hold the model (see make_process_executor). Each finished evaluation is told to the optimizer
+        and immediately replaced by a new candidate, without the polling delays of optimizer.minimize.
+
+        Parameters
+        ----------
+        optimizer: Optimizer
+            optimizer instantiated on the parametrization of this function
+        budget: optional int
+            number of evaluations (defaults to the budget of the optimizer)
+        num_workers: optional int
+            number of worker processes and of simultaneous evaluations
+            (defaults to the num_workers of the optimizer)
+
+        Returns
+        -------
+        Parameter
+            the recommendation of the optimizer
+        """
+        budget = optimizer.budget if budget is None else budget
+        if budget is None:
+            raise ValueError("Budget must be specified")
+        num_workers = optimizer.num_workers if num_workers is None else num_workers
+        running: tp.Dict[futures.Future, p.Parameter] = {}  # type: ignore
+        remaining = budget
+        with self.make_process_executor(num_workers) as executor:
+            while remaining or running:
+                while remaining and len(running) < num_workers:
+                    candidate = optimizer.ask()
+                    running[executor.submit(self.function, *candidate.args, **candidate.kwargs)] = candidate
+                    remaining -= 1
+                done, _ = futures.wait(running, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    optimizer.tell(running.pop(future), future.result())
+        return optimizer.provide_recommendation()
 
     def _pyomo_constraint_wrapper(self, i: int, instru: tp.ArgsKwargs) -> bool:
+        """Checks the i-th constraint on a candidate. The kwargs dict of the candidate is identified by
+        its identity (all the constraints being checked on the same dict), so that it must not be modified
+        in place between checks: a dict modified in place gets the results of its previous values.
+        """
         k_model_variables = instru[1]
+        if k_model_variables is not self._last_checked:
+            self._last_checked = k_model_variables  # keeping the reference ensures its id is not reused
+            self._last_entry = self._get_cache_entry(k_model_variables)
+            self._last_x = None
+        entry = self._last_entry
+        if i not in entry:
+            entry[i] = self._check_constraint(i, k_model_variables)
+        return entry[i]  # type: ignore
+
+    def _check_constraint(self, i: int, k_model_variables: tp.Dict[str, tp.Any]) -> bool:
+        if self._con_A is not None:
+            if self._last_x is None:
+                self._check_domains(k_model_variables)
+                self._last_x = self._make_vector(k_model_variables)
+            rows = self._con_slices[i]
+            values = self._con_A[rows] @ self._last_x
+            return bool(np.all(values >= self._con_lb[rows]) and np.all(values <= self._con_ub[rows]))
         # Combine all constraints into single one
-        self._pyomo_value_assignment(k_model_variables)
-        if isinstance(self.all_constraints[i], pyomo.base.constraint.SimpleConstraint):
-            return bool(pyomo.value(self.all_constraints[i].expr(self._model_instance)))
-        elif isinstance(self.all_constraints[i], pyomo.base.constraint.IndexedConstraint):
-            ret = True
-            for _, c in self.all_constraints[i].items():
-                ret = ret and pyomo.value(c.expr(self._model_instance))
-                if not ret:
-                    break
-            return ret
-        else:
-            raise NotImplementedError(
-                f"Constraint type {self.all_constraints[i].ctype} is not supported yet."
-            )
+        if k_model_variables is not self._last_assigned:
+            self._pyomo_value_assignment(k_model_variables)
+        bounds = self._constraint_bounds[i]
+        if bounds is not None:
+            return all(lb <= body() <= ub for body, lb, ub in bounds)
+        return all(e() for e in self._constraint_exprs[i])
@@ -4,6 +4,9 @@
 # LICENSE file in the root directory of this source tree.
 import typing as tp
 import os
+import pickle
+from unittest.mock import patch
+import pytest
 import numpy as np
 import pyomo.environ as pyomo
 import nevergrad as ng
@@ -84,3 +87,322 @@ def test_pyomo_set() -> None:
     recommendation = optimizer.minimize(func.function)
 
     np.testing.assert_almost_equal(recommendation.kwargs["x"], 2.0, decimal=1)
+
+
+def test_pyomo_pickle() -> None:
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var([0, 1], domain=pyomo.Reals)
+    model.obj = pyomo.Objective(rule=square)
+    func = core.Pyomo(model)
+    kwargs = {"x[0]": 1.5, "x[1]": 0.5}
+    assert func.function(**kwargs) == 1.0
+    func2 = pickle.loads(pickle.dumps(func))
+    assert func2.function(**kwargs) == 1.0
+
+
+def test_pyomo_evaluate_population() -> None:
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var([0, 1], domain=pyomo.Reals)
+    model.obj = pyomo.Objective(rule=square, sense=pyomo.maximize)
+    func = core.Pyomo(model)
+    optimizer = ng.optimizers.OnePlusOne(parametrization=func.parametrization, budget=20, num_workers=4)
+    for _ in range(5):  # budget / num_workers
+        candidates = [optimizer.ask() for _ in range(optimizer.num_workers)]
+        losses = func.evaluate_population([c.kwargs for c in candidates])
+        expected = np.array([func.function(**c.kwargs) for c in candidates], dtype=float)
+        np.testing.assert_array_almost_equal(losses, expected)
+        for candidate, loss in zip(candidates, losses):
+            optimizer.tell(candidate, loss)
+
+
+def test_pyomo_range_set() -> None:
+    NumericRange = pyomo.base.range.NumericRange
+    model = pyomo.ConcreteModel()
+    model.A = pyomo.RangeSet(ranges=(NumericRange(1, 3, 1), NumericRange(4, 6, 1)))
+    model.B = pyomo.RangeSet(ranges=(NumericRange(1, 3, 1), NumericRange(7, 9, 1)))
+    model.C = pyomo.RangeSet(0, 10, 2)
+    model.D = pyomo.RangeSet(ranges=(NumericRange(0.5, 2.5, 1), NumericRange(3.5, 5.5, 1)))
+    model.x = pyomo.Var(domain=model.A)
+    model.y = pyomo.Var(domain=model.B)
+    model.z = pyomo.Var(domain=model.C)
+    model.w = pyomo.Var(domain=model.D)
+    model.obj = pyomo.Objective(expr=model.x + model.y + model.z + model.w)
+    func = core.Pyomo(model)
+    params = func.parametrization[1]  # type: ignore
+    assert isinstance(params["x"], ng.p.Scalar)
+    assert (params["x"].bounds[0], params["x"].bounds[1]) == (1, 6)  # type: ignore
+    assert isinstance(params["y"], ng.p.Choice)
+    assert list(params["y"].choices.value) == [1, 2, 3, 7, 8, 9]  # type: ignore
+    assert list(params["z"].choices.value) == [0, 2, 4, 6, 8, 10]  # type: ignore
+    assert list(params["w"].choices.value) == [0.5, 1.5, 2.5, 3.5, 4.5, 5.5]  # type: ignore
+    assert func.function(x=6, y=7, z=4, w=0.5) == 17.5
+
+
+def test_pyomo_process_executor() -> None:
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var([0, 1], domain=pyomo.Reals)
+    model.obj = pyomo.Objective(rule=square)
+    model.Constraint1 = pyomo.Constraint(rule=lambda m: m.x[0] >= 1)
+    func = core.Pyomo(model)
+    optimizer = ng.optimizers.OnePlusOne(parametrization=func.parametrization, budget=40, num_workers=2)
+    with func.make_process_executor(optimizer.num_workers) as executor:
+        future = executor.submit(func.function, **{"x[0]": 1.5, "x[1]": 0.5})
+        assert future.result() == 1.0
+        recommendation = optimizer.minimize(func.function, executor=executor)
+    assert recommendation.kwargs["x[0]"] >= 1
+
+
+def test_pyomo_jit_objective() -> None:
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var(domain=pyomo.Reals)
+    model.y = pyomo.Var([0, 1], domain=pyomo.Reals)
+    model.obj = pyomo.Objective(
+        expr=(1 - model.x) ** 2 + 100 * (model.y[0] - model.x ** 2) ** 2 + pyomo.exp(abs(model.y[1])) / 3
+    )
+    func = core.Pyomo(model)
+    assert func._jit_obj is not None
+    kwargs = {"x": 0.3, "y[0]": -1.2, "y[1]": -0.5}
+    expected = (1 - 0.3) ** 2 + 100 * (-1.2 - 0.3 ** 2) ** 2 + np.exp(0.5) / 3
+    np.testing.assert_almost_equal(func.function(**kwargs), expected)
+    # mutable parameters are not compiled
+    model.p = pyomo.Param(initialize=2.0, mutable=True)
+    model.obj.deactivate()
+    model.obj2 = pyomo.Objective(expr=model.p * model.x ** 2)
+    func = core.Pyomo(model)
+    assert func._jit_obj is None
+    np.testing.assert_almost_equal(func.function(**kwargs), 0.18)
+
+
+def test_pyomo_jit_objective_unused_variable() -> None:
+    model = pyomo.ConcreteModel()
+    model.S = pyomo.Set(initialize=["a", "b"])
+    model.x = pyomo.Var(domain=model.S)
+    model.y = pyomo.Var(domain=pyomo.Reals)
+    model.obj = pyomo.Objective(expr=model.y ** 2 * model.y)
+    func = core.Pyomo(model)
+    assert func._jit_obj is not None
+    assert func.function(x="a", y=2.0) == 8.0
+
+
+def test_pyomo_jit_objective_infinite_constant() -> None:
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var(domain=pyomo.Reals)
+    model.y = pyomo.Var(domain=pyomo.Reals)
+    model.p = pyomo.Param(initialize=float("inf"))
+    model.obj = pyomo.Objective(expr=pyomo.atan(model.p * model.x * model.y))
+    func = core.Pyomo(model)
+    assert func._jit_obj is not None
+    np.testing.assert_almost_equal(func.function(x=1.0, y=2.0), np.pi / 2)
+
+
+def test_pyomo_jit_objective_fallback() -> None:
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var(domain=pyomo.Reals)
+    expr = model.x
+    for _ in range(150):
+        expr = pyomo.sin(np.e * expr)
+    model.obj = pyomo.Objective(expr=expr)
+    func = core.Pyomo(model, copy_model=False)  # too deeply nested to be compiled
+    assert func._jit_obj is None
+    np.testing.assert_almost_equal(func.function(x=0.0), 0.0)
+    model.obj.deactivate()
+    model.obj2 = pyomo.Objective(expr=model.x ** 0.5 + model.x ** 2)
+    func = core.Pyomo(model, copy_model=False)
+    assert func._jit_obj is not None
+    assert func.function(x=4.0) == 18.0
+    with pytest.raises(TypeError):  # complex results are not numbers, with or without numba
+        func.function(x=-4.0)
+
+
+def test_pyomo_linear_model() -> None:
+    items = ["hammer", "wrench", "screwdriver", "towel"]
+    values = {"hammer": 8, "wrench": 3, "screwdriver": 6, "towel": 11}
+    weights = {"hammer": 5, "wrench": 7, "screwdriver": 4, "towel": 3}
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var(items, within=pyomo.Binary)
+    model.value = pyomo.Objective(expr=sum(values[i] * model.x[i] for i in items), sense=pyomo.maximize)
+    model.weight = pyomo.Constraint(expr=sum(weights[i] * model.x[i] for i in items) <= 14)
+    model.bounds = pyomo.Constraint(items, rule=lambda m, i: pyomo.inequality(0, m.x[i] + 1, 1.5))
+    func = core.Pyomo(model, copy_model=False)
+    kwargs = {f'x["{i}"]': 1 for i in items}
+    assert func.function(**kwargs) == -28
+    assert not func._pyomo_constraint_wrapper(0, ((), kwargs))
+    assert not func._pyomo_constraint_wrapper(1, ((), kwargs))
+    kwargs = dict(kwargs, **{'x["wrench"]': 0})
+    assert func._pyomo_constraint_wrapper(0, ((), kwargs))
+    kwargs = {f'x["{i}"]': 0 for i in items}
+    assert func._pyomo_constraint_wrapper(1, ((), kwargs))
+    assert all(model.x[i].value is None for i in items)  # evaluated without assigning the model
+
+
+def test_pyomo_not_linearizable() -> None:
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var([0, 1], domain=pyomo.Reals)
+    condition = pyomo.Expr_if(IF=model.x[0] >= 1, THEN=1, ELSE=0)
+    model.obj = pyomo.Objective(expr=model.x[0] * model.x[1] + condition)
+    model.constraint = pyomo.Constraint(expr=pyomo.Expr_if(IF=model.x[1] >= 1, THEN=model.x[0], ELSE=0) <= 2)
+    func = core.Pyomo(model)
+    assert func._obj_c is None and func._con_A is None
+    assert func.function(**{"x[0]": 1.0, "x[1]": 1.0}) == 2.0
+    assert func._pyomo_constraint_wrapper(0, ((), {"x[0]": 1.0, "x[1]": 1.0}))
+    assert not func._pyomo_constraint_wrapper(0, ((), {"x[0]": 3.0, "x[1]": 1.0}))
+
+
+def test_pyomo_evaluate_batch() -> None:
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var([0, 1, 2], domain=pyomo.Reals)
+    model.obj = pyomo.Objective(expr=model.x[0] - 2 * model.x[1] + 1)
+    model.constraint = pyomo.Constraint([0, 1, 2], rule=lambda m, i: m.x[i] <= 1)
+    linear = core.Pyomo(model)
+    model.obj.deactivate()
+    model.obj2 = pyomo.Objective(rule=square)
+    model.constraint2 = pyomo.Constraint(rule=lambda m: m.x[0] ** 2 <= 2)
+    nonlinear = core.Pyomo(model)
+    assert linear._con_A is not None and nonlinear._con_A is None
+    X = np.array([[0.0, 0.5, 1.0], [2.0, 0.0, 0.0], [1.0, 1.0, 1.0]])
+    for func in [linear, nonlinear]:
+        obj_values, feasible = func.evaluate_batch(X)
+        expected = np.array([func.function(**dict(zip(["x[0]", "x[1]", "x[2]"], x))) for x in X], dtype=float)
+        np.testing.assert_array_almost_equal(obj_values, expected)
+        np.testing.assert_array_equal(feasible, [True, False, True])
+    # linear objective with a nonlinear constraint: evaluating the objective does not check the constraints
+    model.obj2.deactivate()
+    model.obj.activate()
+    func = core.Pyomo(model)
+    with patch.object(func, "_check_constraint", wraps=func._check_constraint) as check:
+        func.evaluate_population(
+            [{"x[0]": 0.0, "x[1]": 0.5, "x[2]": 1.0}, {"x[0]": 2.0, "x[1]": 0.0, "x[2]": 0.0}]
+        )
+        assert not check.call_count
+    # domains are validated without going through Pyomo
+    model.y = pyomo.Var(domain=pyomo.NonNegativeReals)
+    model.z = pyomo.Var(domain=pyomo.Binary)
+    model.obj.deactivate()
+    model.obj3 = pyomo.Objective(expr=model.y + model.z)
+    func = core.Pyomo(model)
+    X = np.array([[0.0, 0.0, 0.0, 0.0, 1.0], [0.0, 0.0, 0.0, 2.5, 0.0]])
+    np.testing.assert_array_equal(func.evaluate_batch(X)[0], [1.0, 2.5])
+    for column, value, domain in [(3, -1.0, "NonNegativeReals"), (4, 0.5, "Binary")]:
+        wrong = X.copy()
+        wrong[1, column] = value
+        with pytest.raises(ValueError, match=f"not in domain {domain}"):
+            func.evaluate_batch(wrong)
+
+
+def test_pyomo_copy_model() -> None:
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var([0, 1], domain=pyomo.Reals)
+    model.obj = pyomo.Objective(expr=model.x[0] * model.x[1])
+    model.p = pyomo.Param(initialize=1.0, mutable=True)  # the constraint is then evaluated through the model
+    model.constraint = pyomo.Constraint(expr=model.p * model.x[0] ** 2 <= 3)
+    kwargs = {"x[0]": 1.5, "x[1]": 0.5}
+    for copy_model in [True, False]:
+        func = core.Pyomo(model, copy_model=copy_model)
+        assert func._model_instance is not model if copy_model else func._model_instance is model
+        assert func.function(**kwargs) == 0.75
+        assert func.parametrization._constraint_checkers[0](((), kwargs))
+        assert (model.x[0].value == 1.5) is not copy_model
+        assert func.copy().descriptors["copy_model"] is copy_model
+
+
+def test_pyomo_copy_shared_model() -> None:
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var(domain=pyomo.Reals)
+    model.y = pyomo.Var(domain=pyomo.Reals)
+    model.obj = pyomo.Objective(expr=model.x * model.y)
+    model.c0 = pyomo.Constraint(expr=model.x * model.y <= 1)
+    model.c1 = pyomo.Constraint(expr=model.y ** 2 <= 1)
+    func = core.Pyomo(model, copy_model=False)
+    func2 = func.copy()
+    assert func2._model_instance is model
+    kwargs_a = {"x": 0.5, "y": 3.0}
+    kwargs_b = {"x": 0.5, "y": 0.5}
+    assert not func._pyomo_constraint_wrapper(0, ((), kwargs_a))
+    assert func2._pyomo_constraint_wrapper(0, ((), kwargs_b))  # assigns the shared model
+    assert not func._pyomo_constraint_wrapper(1, ((), kwargs_a))
+
+
+def test_pyomo_cache() -> None:
+    model = pyomo.ConcreteModel()
+    model.p = pyomo.Param(initialize=2.0, mutable=True)
+    model.x = pyomo.Var(domain=pyomo.NonNegativeReals)
+    model.obj = pyomo.Objective(expr=model.p * model.x ** 2)
+    model.constraint = pyomo.Constraint(expr=model.x ** 2 <= 16)
+    func = core.Pyomo(model)
+    objective = patch.object(func, "_evaluate_objective", wraps=func._evaluate_objective)
+    constraint = patch.object(func, "_check_constraint", wraps=func._check_constraint)
+    with objective as objective_spy, constraint as constraint_spy:
+        for x in list(range(10)) + [9, 2, 0]:  # 9 and 2 are still cached, 0 is not anymore
+            assert func.function(x=x) == 2 * x ** 2
+            assert func._pyomo_constraint_wrapper(0, ((), {"x": x})) == (x <= 4)
+        assert objective_spy.call_count == constraint_spy.call_count == 11
+
+
+def test_pyomo_clear_cache() -> None:
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var(domain=pyomo.Reals)
+    model.p = pyomo.Param(initialize=2.0, mutable=True)
+    model.obj = pyomo.Objective(expr=model.p * model.x)
+    model.constraint = pyomo.Constraint(expr=model.p * model.x <= 3)
+    func = core.Pyomo(model, copy_model=False)
+    kwargs = {"x": 1.0}
+    assert func.function(**kwargs) == 2.0
+    assert func._pyomo_constraint_wrapper(0, ((), kwargs))
+    model.p = 5.0
+    func.clear_cache()
+    assert func.function(**kwargs) == 5.0
+    assert not func._pyomo_constraint_wrapper(0, ((), kwargs))
+
+
+def test_pyomo_drive() -> None:
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var([0, 1], domain=pyomo.Reals)
+    model.obj = pyomo.Objective(rule=square)
+    model.Constraint1 = pyomo.Constraint(rule=lambda m: m.x[0] >= 1)
+    func = core.Pyomo(model)
+    optimizer = ng.optimizers.OnePlusOne(parametrization=func.parametrization, budget=60, num_workers=3)
+    recommendation = func.drive(optimizer)
+    assert optimizer.num_tell == 60
+    assert recommendation.kwargs["x[0]"] >= 1
+
+
+def test_pyomo_fast_objective() -> None:
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var([0, 1], domain=pyomo.Reals)
+    model.p = pyomo.Param(initialize=2.0, mutable=True)
+    objectives = {
+        "monomial": (-3 * model.x[1], -1.5),
+        "variable": (model.x[0], 1.5),
+        "constant": (4.0, 4.0),
+        "param": (model.p * model.x[0], 3.0),
+    }
+    kwargs = {"x[0]": 1.5, "x[1]": 0.5}
+    for name, (expr, expected) in objectives.items():
+        setattr(model, name, pyomo.Objective(expr=expr, sense=pyomo.maximize))
+        func = core.Pyomo(model)
+        assert (func._fast_obj is None) == (name == "param")
+        assert func.function(**kwargs) == -expected
+        pickle.loads(pickle.dumps(func))
+        getattr(model, name).deactivate()
+
+
+def test_pyomo_domain_validation() -> None:
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var([0, 1], domain=pyomo.Binary)
+    model.constraint = pyomo.Constraint(expr=model.x[0] + model.x[1] <= 1)
+    objectives = {
+        "linear": (model.x[0] + 3 * model.x[1], 4),
+        "jit": (model.x[0] * model.x[1], 1),
+        "monomial": (3 * model.x[0], 3),
+    }
+    for name, (expr, expected) in objectives.items():
+        setattr(model, name, pyomo.Objective(expr=expr))
+        func = core.Pyomo(model)
+        assert func.function(**{"x[0]": 1, "x[1]": 1}) == expected
+        with pytest.raises(ValueError, match="not in domain Binary"):
+            func.function(**{"x[0]": 7, "x[1]": 0.5})
+        getattr(model, name).deactivate()
+    with pytest.raises(ValueError, match="not in domain Binary"):
+        func._pyomo_constraint_wrapper(0, ((), {"x[0]": 7, "x[1]": 0.5}))
+    with pytest.raises(ValueError, match="not in domain Binary"):
+        func.evaluate_batch(np.array([[0, 1], [7, 0.5]]))